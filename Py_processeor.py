@@ -1,8 +1,13 @@
 import streamlit as st
-from PIL import Image
-import torch
-from transformers import BlipForConditionalGeneration, AutoProcessor
-import os
+from blip_core import (
+    load_blip,
+    open_image,
+    generate_captions,
+    start_caption,
+    wait_for_caption,
+    save_caption,
+    saved_captions,
+)
 
 # -----------------------------
 # STREAMLIT PAGE CONFIG
@@ -19,50 +24,38 @@ generate_tab, processed_tab = tabs
 # -----------------------------
 # SESSION STATE STORAGE
 # -----------------------------
-if "processed_images" not in st.session_state:
-    st.session_state.processed_images = []  # List of (image, caption)
+if "saved_file_ids" not in st.session_state:
+    st.session_state.saved_file_ids = set()  # uploads already written to the gallery
 
 # -----------------------------
 # LOAD BLIP-1 MODEL (CACHE)
 # -----------------------------
-device = "cuda" if torch.cuda.is_available() else "cpu"
-
-@st.cache_resource
-def load_blip():
-    processor = AutoProcessor.from_pretrained("Salesforce/blip-image-captioning-base", use_fast=False)
-    model = BlipForConditionalGeneration.from_pretrained("Salesforce/blip-image-captioning-base").to(device)
-    return processor, model
-
-processor, model = load_blip()
+load_blip()
 
 # -----------------------------
 # GENERATE CAPTION TAB
 # -----------------------------
 with generate_tab:
-    st.write("Upload an image or take a photo to generate a caption.")
+    st.write("Upload one or more images or take a photo to generate captions.")
 
-    uploaded_file = st.file_uploader("Upload an image", type=["png", "jpg", "jpeg"])
+    uploaded_files = st.file_uploader("Upload images", type=["png", "jpg", "jpeg"], accept_multiple_files=True)
     camera_image = st.camera_input("Or take a photo")
-    image = None
-
-    if uploaded_file:
-        image = Image.open(uploaded_file)
-    elif camera_image:
-        image = Image.open(camera_image)
-
-    if image:
-        st.image(image, caption="Selected Image", width="stretch")
+    files = uploaded_files or ([camera_image] if camera_image else [])
+    images = [open_image(f) for f in files]
 
+    if images:
         try:
-            inputs = processor(image, return_tensors="pt").to(device)
-            with torch.no_grad():
-                out = model.generate(**inputs)
-                caption = processor.decode(out[0], skip_special_tokens=True)
+            # All selected images go through a single batched generate() call on the caption worker
+            captions = wait_for_caption(start_caption(generate_captions, images)) or []
 
-            st.markdown(f"**Caption:** {caption}")
+            for file, image, caption in zip(files, images, captions):
+                st.image(image, caption="Selected Image", width="stretch")
+                st.markdown(f"**Caption:** {caption}")
 
-            # Save to session_state
-            st.session_state.processed_images.append((image.copy(), caption))
+                # This block reruns on every interaction; save each file to the gallery once
+                if file.file_id not in st.session_state.saved_file_ids:
+                    save_caption(image, caption)
+                    st.session_state.saved_file_ids.add(file.file_id)
 
         except Exception as e:
             st.warning("BLIP-1 captioning unavailable.")
@@ -76,8 +69,9 @@ with generate_tab:
 with processed_tab:
     st.write("Previously processed images and their captions:")
 
-    if st.session_state.processed_images:
-        for idx, (img, cap) in enumerate(st.session_state.processed_images):
-            st.image(img, caption=f"Caption: {cap}", use_column_width=True)
+    processed = saved_captions()
+    if processed:
+        for jpeg, cap in processed:
+            st.image(jpeg, caption=f"Caption: {cap}", use_column_width=True)
     else:
         st.info("No images have been processed yet.")
@@ -1,9 +1,15 @@
 import streamlit as st
-from PIL import Image
-import torch
-from transformers import BlipForConditionalGeneration, AutoProcessor
-import requests
-from io import BytesIO
+from blip_core import (
+    load_blip,
+    load_image_from_url,
+    open_image,
+    generate_caption,
+    thumbnail_bytes,
+    save_caption,
+    saved_captions,
+    start_caption,
+    wait_for_caption,
+)
 import base64
 import warnings
 
@@ -27,39 +33,26 @@ generate_tab, processed_tab, helper_tab = tabs
 # -----------------------------
 # SESSION STATE STORAGE
 # -----------------------------
-if "processed_images" not in st.session_state:
-    st.session_state.processed_images = []  # List of (image, caption)
 if "text_input" not in st.session_state:
     st.session_state.text_input = ""  # URL input
-if "use_camera" not in st.session_state:
-    st.session_state.use_camera = False  # Ask if user wants to use camera
 
 # -----------------------------
 # LOAD BLIP-1 MODEL (CACHE)
 # -----------------------------
-device = "cuda" if torch.cuda.is_available() else "cpu"
-
-@st.cache_resource
-def load_blip():
-    try:
-        processor = AutoProcessor.from_pretrained("Salesforce/blip-image-captioning-base", use_fast=False)
-        model = BlipForConditionalGeneration.from_pretrained("Salesforce/blip-image-captioning-base").to(device)
-        return processor, model
-    except Exception:
-        st.warning("Could not load BLIP model. Please check your internet connection or model availability.")
-        return None, None
-
-processor, model = load_blip()
+try:
+    load_blip()
+    model_loaded = True
+except Exception:
+    st.warning("Could not load BLIP model. Please check your internet connection or model availability.")
+    model_loaded = False
 
 # -----------------------------
 # HELPER FUNCTION FOR FADE-IN
 # -----------------------------
-def fade_in_image_caption(img: Image.Image, caption: str):
+def fade_in_image_caption(jpeg: bytes, caption: str):
     try:
-        # Convert image to base64 for inline HTML
-        buffered = BytesIO()
-        img.save(buffered, format="PNG")
-        img_str = base64.b64encode(buffered.getvalue()).decode()
+        # Thumbnail is already JPEG-encoded, so just base64 it for inline HTML
+        img_str = base64.b64encode(jpeg).decode()
         
         html_code = f"""
         <style>
@@ -72,7 +65,7 @@ def fade_in_image_caption(img: Image.Image, caption: str):
         }}
         </style>
         <div class="fade-in">
-            <img src="data:image/png;base64,{img_str}" style="max-width:100%;"/>
+            <img src="data:image/jpeg;base64,{img_str}" style="max-width:100%;"/>
             <p><b>Caption:</b> {caption}</p>
         </div>
         """
@@ -87,7 +80,7 @@ with generate_tab:
     st.write("Upload an image, take a photo, or provide an image URL to generate a caption.")
 
     # Ask user if they want to use the camera
-    st.session_state.use_camera = st.checkbox("Use Camera?", value=False)
+    st.checkbox("Use Camera?", key="use_camera")
 
     uploaded_file = st.file_uploader("Upload an image", type=["png", "jpg", "jpeg"])
     camera_image = None
@@ -101,13 +94,11 @@ with generate_tab:
     # Load image from input
     try:
         if uploaded_file:
-            image = Image.open(uploaded_file)
+            image = open_image(uploaded_file)
         elif camera_image:
-            image = Image.open(camera_image)
+            image = open_image(camera_image)
         elif image_url:
-            response = requests.get(image_url)
-            response.raise_for_status()
-            image = Image.open(BytesIO(response.content))
+            image = load_image_from_url(image_url)
     except Exception:
         st.warning("Could not load the image. Please check the file or URL.")
 
@@ -115,19 +106,16 @@ with generate_tab:
     if image:
         st.image(image, caption="Selected Image", use_column_width=True)
         if st.button("Generate Caption"):
-            if processor and model:
+            if model_loaded:
                 try:
-                    with st.spinner("Generating caption... Please wait."):
-                        inputs = processor(image, return_tensors="pt").to(device)
-                        with torch.no_grad():
-                            out = model.generate(**inputs)
-                            caption = processor.decode(out[0], skip_special_tokens=True)
-
+                    caption = wait_for_caption(start_caption(generate_caption, image))
+                    if caption:
                         # Display with fade-in
-                        fade_in_image_caption(image.copy(), caption)
+                        thumb = thumbnail_bytes(image)
+                        fade_in_image_caption(thumb, caption)
 
-                        # Save to session_state
-                        st.session_state.processed_images.append((image.copy(), caption))
+                        # Save to the gallery
+                        save_caption(image, caption, thumb)
 
                         # Clear URL text input
                         st.session_state.text_input = ""
@@ -145,9 +133,10 @@ with generate_tab:
 with processed_tab:
     st.write("Previously processed images and their captions:")
 
-    if st.session_state.processed_images:
-        for idx, (img, cap) in enumerate(st.session_state.processed_images):
-            fade_in_image_caption(img, cap)
+    processed = saved_captions()
+    if processed:
+        for jpeg, cap in processed:
+            fade_in_image_caption(jpeg, cap)
     else:
         st.info("No images have been processed yet.")
 
@@ -0,0 +1,264 @@
+import streamlit as st
+from contextlib import nullcontext
+from blip_core import (
+    PRESETS,
+    IMAGE_ERRORS,
+    safe_block,
+    is_new_file,
+    release_memory,
+    load_blip,
+    prefetch_presets,
+    load_image_from_url,
+    open_image,
+    preset_caption,
+    caption_presets,
+    generate_caption,
+    save_caption,
+    saved_captions,
+    start_caption,
+    wait_for_caption,
+    tts_button,
+)
+
+# ===============================
+# IMAGE SOURCES
+# ===============================
+SOURCES = ["Sample Images", "Upload Image", "Image URL", "Camera"]
+
+# ===============================
+# APP VARIANTS
+# ===============================
+# Final_code.py / POC_With_TTS_&_Preset_images.py
+TTS_APP = {
+    "intro_md": """
+Once you choose a source and choose an image, the **Generate Caption** button will appear
+below that source.
+""",
+    "options": ["Sample images", "Upload an image", "Paste an image URL", "Use your camera"],
+    "instructions_md": """
+### How this app works
+• Choose an image source  
+• Click **Generate Caption**  
+• Use **🔊 Read Caption Aloud** to hear it  
+• View history in **Processed Images**
+""",
+    "tts": True,
+    "preset_width": 250,
+}
+
+# Preset_image_Website.py
+WEBSITE_APP = {
+    "intro_md": """
+Once you choose a source and choose an image, the generate caption button will appear below the source, and when you click the button, the image will be identified and captioned
+""",
+    "options": [
+        "Sample images",
+        "Upload an image from your device",
+        "Paste a secure Image URL into the text box",
+        "Allow Access to your camera and take a picture.",
+    ],
+    "instructions_md": """
+### How this app works
+
+• Choose a **Sample image**, **upload**, **camera**, or **URL**  
+• Click **Generate Caption**    
+• Results are saved in **Processed Images**  
+
+This app is optimized for education and research use.
+""",
+    "tts": False,
+    "use_containers": True,
+}
+
+# ===============================
+# HELPERS
+# ===============================
+def set_active(img, source, job=None):
+    st.session_state.active_image = img
+    st.session_state.active_caption = None
+    st.session_state.active_source = source
+    # Captioning starts as soon as an image is picked and overlaps with the preview
+    if job is None and img is not None:
+        job = start_caption(generate_caption, img)
+    st.session_state.caption_job = job
+    release_memory()
+
+def render_caption_panel(source, width=300, tts=True):
+    # Preview, Generate button and caption for whichever source owns the active image
+    if st.session_state.active_source != source:
+        return
+    st.image(st.session_state.active_image, width=width)
+
+    if st.button("Generate Caption", key=f"gen_{source}"):
+        caption = None
+        with safe_block():
+            caption = wait_for_caption(st.session_state.caption_job)
+        if caption:
+            st.session_state.active_caption = caption
+            save_caption(st.session_state.active_image, caption)
+
+    if st.session_state.active_caption:
+        st.success(st.session_state.active_caption)
+        if tts:
+            tts_button(st.session_state.active_caption)
+
+# ===============================
+# APP
+# ===============================
+def run(intro_md, options, instructions_md, tts=True, preset_width=300, use_containers=False):
+    # One preset app; the entry scripts only differ in copy, TTS and layout
+    section = st.container if use_containers else nullcontext
+
+    # ===============================
+    # PAGE CONFIG
+    # ===============================
+    st.set_page_config(
+        page_title="Image Identification and Captioning",
+        layout="wide",
+        initial_sidebar_state="collapsed"
+    )
+
+    st.title("Image Identification and Captioning")
+
+    # ===============================
+    # LOAD MODEL (CACHED)
+    # ===============================
+    load_blip()
+    preset_images = prefetch_presets()
+
+    # ===============================
+    # SESSION STATE
+    # ===============================
+    if "active_image" not in st.session_state:
+        st.session_state.active_image = None
+    if "active_caption" not in st.session_state:
+        st.session_state.active_caption = None
+    if "active_source" not in st.session_state:
+        st.session_state.active_source = None
+    if "active_section" not in st.session_state:
+        st.session_state.active_section = None
+    if "loaded_file_id" not in st.session_state:
+        st.session_state.loaded_file_id = None
+    if "url_input" not in st.session_state:
+        st.session_state.url_input = ""
+
+    # ===============================
+    # TABS
+    # ===============================
+    tab1, tab2, tab3 = st.tabs(["Generate Caption", "Processed Images", "Instructions"])
+
+    # ======================================================
+    # TAB 1 — GENERATE
+    # ======================================================
+    with tab1:
+        st.markdown(intro_md)
+
+        st.markdown("**Options**")
+        for i, option in enumerate(options, 1):
+            st.markdown(f"{i}. {option}")
+
+        source = st.radio(
+            "Choose a source",
+            SOURCES,
+            horizontal=True,
+            key="source_choice"
+        )
+        if source != st.session_state.active_section:
+            # Switching sources is the only place the active image is cleared
+            st.session_state.active_section = source
+            st.session_state.loaded_file_id = None
+            set_active(None, None)
+
+        # ---------- SAMPLE IMAGES ----------
+        if source == "Sample Images":
+            st.subheader("Sample Images")
+            with section():
+                cols = st.columns(len(PRESETS))
+
+                for col, (name, url) in zip(cols, PRESETS.items()):
+                    with col:
+                        if st.button(name, key=f"preset_{name}"):
+                            img = None
+                            with safe_block(IMAGE_ERRORS):
+                                img = preset_images.get(name) or load_image_from_url(url)
+                            if img:
+                                set_active(img, f"preset_{name}", start_caption(preset_caption, url))
+
+                # Batch every loaded preset through a single generate() call
+                if preset_images and st.button("Caption All", key="preset_caption_all"):
+                    captions = None
+                    with safe_block():
+                        captions = wait_for_caption(start_caption(caption_presets, tuple(preset_images)))
+                    if captions:
+                        for name, caption in captions.items():
+                            save_caption(preset_images[name], caption)
+                        st.success(f"Captioned {len(captions)} presets, see Processed Images")
+
+                # Only the selected preset gets a panel, rendered once below the button row
+                if (st.session_state.active_source or "").startswith("preset_"):
+                    render_caption_panel(st.session_state.active_source, width=preset_width, tts=tts)
+
+        # ---------- UPLOAD ----------
+        elif source == "Upload Image":
+            st.subheader("Upload Image")
+            with section():
+                uploaded = st.file_uploader("Upload", type=["jpg", "png", "jpeg"], key="upload")
+
+                if is_new_file(uploaded):
+                    set_active(open_image(uploaded), "upload")
+
+                render_caption_panel("upload", tts=tts)
+
+        # ---------- URL ----------
+        elif source == "Image URL":
+            st.subheader("Image URL")
+            with section():
+                url = st.text_input(
+                    "Paste image URL",
+                    value=st.session_state.url_input,
+                    placeholder="https://raw.githubusercontent.com/...",
+                    key="url_input_box"
+                )
+
+                if st.button("Load Image from URL", key="load_url"):
+                    try:
+                        img = load_image_from_url(url)
+                        set_active(img, "url")
+                        st.session_state.url_input = ""
+                    except IMAGE_ERRORS:
+                        st.error("Failed to load image from URL")
+
+                render_caption_panel("url", tts=tts)
+
+        # ---------- CAMERA ----------
+        elif source == "Camera":
+            st.subheader("Camera")
+            with section():
+                use_camera = st.checkbox("Use Camera", key="camera_toggle")
+
+                if use_camera:
+                    camera_img = st.camera_input("Take a picture", key="camera_input")
+                    if is_new_file(camera_img):
+                        set_active(open_image(camera_img), "camera")
+
+                render_caption_panel("camera", tts=tts)
+
+    # ======================================================
+    # TAB 2 — PROCESSED
+    # ======================================================
+    with tab2:
+        st.subheader("Processed Images")
+        processed = saved_captions()
+        if not processed:
+            st.info("No processed images yet.")
+        else:
+            for jpeg, caption in processed:
+                st.image(jpeg, width=200)
+                st.markdown(f"**Caption:** {caption}")
+                st.divider()
+
+    # ======================================================
+    # TAB 3 — INSTRUCTIONS
+    # ======================================================
+    with tab3:
+        st.markdown(instructions_md)
@@ -0,0 +1,509 @@
+import base64
+import gc
+import hashlib
+import importlib.util
+import os
+import sqlite3
+import sys
+import time
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as JobTimeout
+from contextlib import closing, contextmanager
+from io import BytesIO
+
+import numpy as np
+import requests
+import streamlit as st
+import streamlit.components.v1 as components
+from PIL import Image, ImageOps
+from requests.adapters import HTTPAdapter
+
+try:
+    from turbojpeg import TurboJPEG, TJPF_RGB
+    _TURBO = TurboJPEG()
+except (ImportError, RuntimeError, OSError):
+    _TURBO = None  # libjpeg-turbo not available, fall back to Pillow
+
+# ===============================
+# MODEL
+# ===============================
+MODEL_ID = "Salesforce/blip-image-captioning-base"
+
+# Opt-in bitsandbytes int8 weights on CUDA, for GPUs where memory is the limit
+LOAD_IN_8BIT = os.environ.get("BLIP_LOAD_IN_8BIT") == "1"
+
+# Opt-in optimize_for_inference on the traced encoder; measure before enabling
+JIT_OPTIMIZE = os.environ.get("BLIP_JIT_OPTIMIZE") == "1"
+
+# Greedy decoding with the KV cache; one caption is shown, so beams buy little.
+# BLIP's generate() already stops on [SEP] and sets the pad id itself.
+GENERATE_KWARGS = {
+    "max_new_tokens": 20,
+    "num_beams": 1,
+    "do_sample": False,
+    "use_cache": True,
+}
+
+# ===============================
+# PRESET IMAGES
+# ===============================
+PRESETS = {
+    "Flies": "https://raw.githubusercontent.com/mamillasrisan-lab/Images/refs/heads/main/FF/fruit_flies_in_farms_135.jpg",
+    "Vehicle": "https://raw.githubusercontent.com/mamillasrisan-lab/Images/refs/heads/main/CAR/cars_1.jpg",
+    "Exhibit": "https://raw.githubusercontent.com/mamillasrisan-lab/Images/refs/heads/main/Exhibit/Historical_Exhibit_room_177.jpg",
+    "Multiple Objects": "https://raw.githubusercontent.com/mamillasrisan-lab/Images/refs/heads/main/HO/House_hold_objects_156.jpg",
+    "Fire": "https://raw.githubusercontent.com/mamillasrisan-lab/Images/refs/heads/main/WF/wilfires_with_cars_184.jpg",
+    "Plane 1": "https://raw.githubusercontent.com/mamillasrisan-lab/Images/refs/heads/main/JP%2BRP/planes_23.jpg",
+    "Plane 2": "https://raw.githubusercontent.com/mamillasrisan-lab/Images/refs/heads/main/JP%2BRP/planes_94.jpg",
+}
+
+# ===============================
+# IMAGE DECODING
+# ===============================
+# The model sees 384x384, so JPEGs are decoded at the smallest DCT scale still covering this
+DECODE_SIZE = (768, 768)
+
+# URL downloads past this size are rejected rather than decoded
+MAX_IMAGE_BYTES = 10 * 1024 * 1024
+
+# ===============================
+# PROCESSED HISTORY
+# ===============================
+HISTORY_LIMIT = 50
+HISTORY_TTL = 24 * 3600  # seconds a row is kept after it was saved
+
+# Captioned thumbnails behind every app's Processed Images tab. History is per
+# Streamlit session: a reload or server restart starts an empty one, and the rows
+# it leaves behind stay on disk until HISTORY_TTL expires them
+HISTORY_DB = os.environ.get("BLIP_HISTORY_DB") or "captions.db"
+
+# Captions remembered by image content hash
+CAPTION_CACHE_SIZE = 256
+
+# Seconds a page waits on a queued caption job before giving up
+CAPTION_TIMEOUT = 60
+
+# Name prefix of the caption worker thread
+CAPTION_THREAD = "blip-caption"
+
+# ===============================
+# LOAD MODEL (CACHED)
+# ===============================
+def _trace_vision_model(model):
+    import torch
+
+    class TracedVisionModel(torch.nn.Module):
+        # generate() passes extra kwargs and only reads vision_outputs[0]
+        def __init__(self, traced, config):
+            super().__init__()
+            self.traced = traced
+            self.config = config
+
+        def forward(self, pixel_values, **kwargs):
+            return (self.traced(pixel_values),)
+
+    class VisionLastHidden(torch.nn.Module):
+        # Traced as a module (not a lambda) so it can be frozen
+        def __init__(self, vision):
+            super().__init__()
+            self.vision = vision
+
+        def forward(self, pixel_values):
+            return self.vision(pixel_values, return_dict=False)[0]
+
+    vision = model.vision_model
+    size = vision.config.image_size
+    example = torch.zeros(1, 3, size, size, device=model.device, dtype=model.dtype)
+    with torch.inference_mode():
+        traced = torch.jit.trace(VisionLastHidden(vision).eval(), example, check_trace=False)
+    if JIT_OPTIMIZE:
+        traced = torch.jit.optimize_for_inference(traced)
+    return TracedVisionModel(traced, vision.config)
+
+def _warm_up(processor, model):
+    import torch
+
+    # Pay kernel selection / graph capture at startup rather than on the first click,
+    # with the same uint8 channels_last batch preprocess() hands to the model
+    size = processor.image_processor.size
+    pixels = torch.zeros(1, size["height"], size["width"], 3, dtype=torch.uint8).permute(0, 3, 1, 2)
+    pixel_values = _normalize(pixels.to(model.device), processor.image_processor, model.dtype)
+    with torch.inference_mode(), torch.autocast(
+        device_type=model.device.type, dtype=model.dtype, enabled=model.device.type == "cuda"
+    ):
+        model.generate(pixel_values=pixel_values, max_new_tokens=5)
+    if model.device.type == "cuda":
+        torch.cuda.synchronize()  # finish queued kernels before the first caption
+
+@st.cache_resource
+def load_blip():
+    # Heavy imports live here so the page renders before torch/transformers load
+    import torch
+    from transformers import BlipForConditionalGeneration, AutoProcessor
+
+    device = "cuda" if torch.cuda.is_available() else "cpu"
+    dtype = torch.float16 if device == "cuda" else torch.float32
+    processor = AutoProcessor.from_pretrained(MODEL_ID, use_fast=True)
+    use_8bit = LOAD_IN_8BIT and device == "cuda" and importlib.util.find_spec("bitsandbytes") is not None
+    if use_8bit:
+        from transformers import BitsAndBytesConfig
+
+        # bitsandbytes places the int8 weights itself, so the model must not be moved afterwards
+        model = BlipForConditionalGeneration.from_pretrained(
+            MODEL_ID,
+            torch_dtype=dtype,
+            device_map={"": 0},
+            quantization_config=BitsAndBytesConfig(load_in_8bit=True),
+        )
+    else:
+        # Load straight into empty weights instead of a random-initialised copy first
+        model = BlipForConditionalGeneration.from_pretrained(
+            MODEL_ID, torch_dtype=dtype, low_cpu_mem_usage=True
+        ).to(device)
+    # Grad mode is thread-local, so freeze the weights rather than toggling it globally
+    model = model.eval().requires_grad_(False)
+    if device == "cuda":
+        torch.backends.cuda.matmul.allow_tf32 = True
+        torch.backends.cudnn.benchmark = True
+    # int8 matmuls run in bitsandbytes kernels, which torch.compile does not trace
+    if device == "cuda" and not use_8bit:
+        # NHWC lets cuDNN use its tensor-core path for the patch-embedding conv
+        model.vision_model.to(memory_format=torch.channels_last)
+    elif device == "cpu":
+        # torch sizes intra-op threads from the host's cores and ignores cgroup CPU quotas,
+        # so in a container set BLIP_CPU_THREADS to the quota; anything else is ignored
+        threads = os.environ.get("BLIP_CPU_THREADS", "").strip()
+        if threads.isdigit() and int(threads) > 0:
+            torch.set_num_threads(int(threads))
+        # generate() runs one at a time on the caption worker, so skip the inter-op
+        # pool to avoid contending with the server threads
+        try:
+            torch.set_num_interop_threads(1)
+        except RuntimeError:
+            pass  # can only be set before any inter-op work has started
+        # INT8 weights for the decoder Linears; the conv-heavy encoder stays FP32
+        if "onednn" in torch.backends.quantized.supported_engines:
+            torch.backends.quantized.engine = "onednn"
+        model.text_decoder = torch.quantization.quantize_dynamic(
+            model.text_decoder, {torch.nn.Linear}, dtype=torch.qint8
+        )
+        # The encoder always sees a fixed 384x384 input, so a traced graph fits it
+        try:
+            model.vision_model = _trace_vision_model(model)
+        except Exception:
+            pass  # keep the eager encoder if tracing is unsupported
+
+    # Compile and warm up on the caption worker; this only queues that job, since
+    # waiting on the worker while holding this cache's lock can deadlock
+    caption_executor()
+    return processor, model
+
+@st.cache_resource(show_spinner=False)
+def _warm_blip():
+    # Only called on the caption worker: captions run there and CUDA graphs are
+    # recorded per thread
+    import torch
+
+    processor, model = load_blip()
+    if model.device.type == "cuda" and not getattr(model, "is_loaded_in_8bit", False):
+        # generate() bypasses a compiled wrapper, so compile the fixed-shape encoder and
+        # the decoder's forward (which generate() calls once per token) in place
+        eager_vision, eager_forward = model.vision_model, model.text_decoder.forward
+        try:
+            model.vision_model = torch.compile(model.vision_model, mode="reduce-overhead")
+            model.text_decoder.forward = torch.compile(model.text_decoder.forward, dynamic=True)
+            _warm_up(processor, model)  # compilation is lazy, so failures surface here
+            return processor, model
+        except Exception:
+            model.vision_model = eager_vision
+            model.text_decoder.forward = eager_forward
+            # No Inductor here, so a traced encoder is the next best thing
+            try:
+                model.vision_model = _trace_vision_model(model)
+            except Exception:
+                pass  # keep the eager encoder if tracing is unsupported
+    _warm_up(processor, model)
+    return processor, model
+
+# ===============================
+# HELPERS
+# ===============================
+# What fetching + decoding an image can raise (UnidentifiedImageError is an OSError;
+# DecompressionBombError is not, and a tiny file can still declare huge dimensions)
+IMAGE_ERRORS = (requests.RequestException, OSError, Image.DecompressionBombError)
+
+@contextmanager
+def safe_block(errors=Exception):
+    # Surface the failure in the page instead of silently dropping it
+    try:
+        yield
+    except errors as e:
+        st.exception(e)
+
+def release_memory():
+    # Drop the previous image's buffers and return cached CUDA blocks to the driver;
+    # torch is only consulted if something already imported it
+    gc.collect()
+    torch = sys.modules.get("torch")
+    if torch is not None and torch.cuda.is_available():
+        torch.cuda.empty_cache()
+
+@st.cache_resource
+def http_session():
+    # One keep-alive pool per process so repeat fetches skip the TCP + TLS handshake
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=8, pool_maxsize=8)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+def open_image(fp):
+    with Image.open(fp) as img:
+        img.draft("RGB", DECODE_SIZE)  # JPEG only; other formats ignore it
+        return img.convert("RGB")
+
+def _turbo_scale(data):
+    # Largest DCT downscale that still covers DECODE_SIZE, the same rule draft() uses
+    width, height = _TURBO.decode_header(data)[:2]
+    for denom in (8, 4, 2):
+        if width // denom >= DECODE_SIZE[0] and height // denom >= DECODE_SIZE[1]:
+            return (1, denom)
+    return (1, 1)
+
+def decode_image(data):
+    if _TURBO is not None and data[:3] == b"\xff\xd8\xff":
+        return Image.fromarray(_TURBO.decode(data, pixel_format=TJPF_RGB, scaling_factor=_turbo_scale(data)))
+    with BytesIO(data) as buf:
+        return open_image(buf)
+
+@st.cache_data(ttl=86400, show_spinner=False)
+def load_image_from_url(url):
+    # Stream the body so an oversized image is cut off instead of filling the worker's memory
+    with http_session().get(url, timeout=10, stream=True) as r:
+        r.raise_for_status()
+        # A missing or malformed Content-Length is left to the streaming cap below
+        length = r.headers.get("Content-Length", "").strip()
+        if length.isdigit() and int(length) > MAX_IMAGE_BYTES:
+            raise OSError(f"Image is larger than {MAX_IMAGE_BYTES // 2**20} MB")
+        data = bytearray()
+        for chunk in r.iter_content(chunk_size=64 * 1024):
+            data += chunk
+            if len(data) > MAX_IMAGE_BYTES:
+                raise OSError(f"Image is larger than {MAX_IMAGE_BYTES // 2**20} MB")
+    return decode_image(data)
+
+def is_new_file(uploaded):
+    # Uploaders return the same file on every rerun; only a new one should reset state
+    if uploaded is None or uploaded.file_id == st.session_state.get("loaded_file_id"):
+        return False
+    st.session_state.loaded_file_id = uploaded.file_id
+    return True
+
+def _prefetch(url):
+    try:
+        preset_pixel_values(url)
+        return load_image_from_url(url)
+    except IMAGE_ERRORS:
+        return None  # a failed preset is fetched again on click
+
+@st.cache_resource(show_spinner=False)
+def prefetch_presets():
+    # Download every preset once per process, in parallel over the pooled session,
+    # so a preset click is a dict lookup instead of a round trip
+    with ThreadPoolExecutor(max_workers=len(PRESETS)) as pool:
+        images = dict(zip(PRESETS, pool.map(_prefetch, PRESETS.values())))
+    return {name: img for name, img in images.items() if img is not None}
+
+def thumbnail_bytes(image, size=(256, 256), quality=80):
+    # History keeps a small JPEG instead of the full decoded pixel buffer
+    # contain() resizes into a new small image, so the full-size source is never copied
+    fits = image.width <= size[0] and image.height <= size[1]
+    thumb = image if fits else ImageOps.contain(image, size)
+    buf = BytesIO()
+    thumb.convert("RGB").save(buf, format="JPEG", quality=quality)
+    return buf.getvalue()
+
+@st.cache_resource
+def history_db():
+    # Create the table once per process; callers open their own connection since
+    # reruns and the caption worker run on different threads
+    with closing(sqlite3.connect(HISTORY_DB)) as conn, conn:
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS captions ("
+            "id INTEGER PRIMARY KEY, session TEXT, hash TEXT, jpeg BLOB, caption TEXT, "
+            "ts REAL, UNIQUE (session, hash))"
+        )
+        conn.execute("CREATE INDEX IF NOT EXISTS captions_ts ON captions (ts)")
+    return HISTORY_DB
+
+def session_id():
+    if "session_id" not in st.session_state:
+        st.session_state.session_id = uuid.uuid4().hex
+    return st.session_state.session_id
+
+def save_caption(image, caption, jpeg=None):
+    # REPLACE drops the old row for this image, so a re-caption moves it to the end
+    now = time.time()
+    row = (session_id(), image_hash(image), jpeg or thumbnail_bytes(image), caption, now)
+    with closing(sqlite3.connect(history_db())) as conn, conn:
+        conn.execute("INSERT OR REPLACE INTO captions (session, hash, jpeg, caption, ts) VALUES (?, ?, ?, ?, ?)", row)
+        # Keep only the newest HISTORY_LIMIT rows per session
+        conn.execute(
+            "DELETE FROM captions WHERE session = ? AND id NOT IN "
+            "(SELECT id FROM captions WHERE session = ? ORDER BY id DESC LIMIT ?)",
+            (row[0], row[0], HISTORY_LIMIT),
+        )
+        # Sessions end without telling us, so their rows are only dropped once expired
+        conn.execute("DELETE FROM captions WHERE ts < ?", (now - HISTORY_TTL,))
+
+def saved_captions(limit=HISTORY_LIMIT):
+    with closing(sqlite3.connect(history_db())) as conn:
+        return conn.execute(
+            "SELECT jpeg, caption FROM captions WHERE session = ? ORDER BY id DESC LIMIT ?",
+            (session_id(), limit),
+        ).fetchall()
+
+def preprocess(images):
+    import torch
+
+    processor, model = load_blip()
+    image_processor = processor.image_processor
+    size = (image_processor.size["width"], image_processor.size["height"])
+    if isinstance(images, Image.Image):
+        images = [images]
+    # Resize to the model input on the host but stay uint8: normalization happens on
+    # the model's device, so a quarter of the float32 bytes cross over
+    arrays = [
+        np.asarray((img if img.mode == "RGB" else img.convert("RGB")).resize(size, image_processor.resample))
+        for img in images
+    ]
+    # Stack straight into page-locked memory on CUDA so the upload can be asynchronous
+    batch = torch.empty(
+        (len(arrays), size[1], size[0], 3), dtype=torch.uint8, pin_memory=model.device.type == "cuda"
+    )
+    np.stack(arrays, out=batch.numpy())
+    # The NHWC buffer viewed as NCHW is already channels_last, which the encoder wants on CUDA
+    return batch.permute(0, 3, 1, 2)
+
+def _normalize(pixels, image_processor, dtype):
+    import torch
+
+    # (x * rescale - mean) / std folded into a single x * scale + shift
+    std = torch.tensor(image_processor.image_std, device=pixels.device).view(1, 3, 1, 1)
+    mean = torch.tensor(image_processor.image_mean, device=pixels.device).view(1, 3, 1, 1)
+    scale = image_processor.rescale_factor / std
+    return torch.addcmul(-mean / std, pixels.float(), scale).to(dtype)
+
+@st.cache_resource(max_entries=32, show_spinner=False)
+def preset_pixel_values(url):
+    # Presets never change: keep their resized uint8 batch on the model's device and
+    # share the one tensor instead of unpickling a CPU copy on every hit
+    _, model = load_blip()
+    return preprocess(load_image_from_url(url)).to(model.device)
+
+def caption_pixel_values(pixel_values):
+    # Takes preprocess() output: a resized uint8 NCHW batch
+    # One caption per row, so a stacked batch shares a single generate() call
+    import torch
+
+    processor, model = _warm_blip()
+    pixel_values = _normalize(pixel_values.to(model.device, non_blocking=True), processor.image_processor, model.dtype)
+    with torch.inference_mode(), torch.autocast(
+        device_type=model.device.type, dtype=model.dtype, enabled=model.device.type == "cuda"
+    ):
+        out = model.generate(pixel_values=pixel_values, **GENERATE_KWARGS)
+    return processor.batch_decode(out, skip_special_tokens=True)
+
+def image_hash(image):
+    h = hashlib.blake2b(digest_size=16)
+    h.update(f"{image.mode}{image.size}".encode())
+    h.update(image.tobytes())
+    return h.hexdigest()
+
+@st.cache_resource
+def _caption_cache():
+    # Content hash -> caption, least recently used first. Only the single caption
+    # worker reads or writes it, so it needs no lock.
+    return OrderedDict()
+
+def generate_captions(images):
+    # Cache hits skip the model; only the misses share one batched generate()
+    cache = _caption_cache()
+    hashes = [image_hash(img) for img in images]
+    misses = [i for i, h in enumerate(hashes) if h not in cache]
+    if misses:
+        fresh = caption_pixel_values(preprocess([images[i] for i in misses]))
+        for i, caption in zip(misses, fresh):
+            cache[hashes[i]] = caption
+    captions = []
+    for h in hashes:
+        cache.move_to_end(h)
+        captions.append(cache[h])
+    while len(cache) > CAPTION_CACHE_SIZE:
+        cache.popitem(last=False)
+    return captions
+
+def generate_caption(image):
+    return generate_captions([image])[0]
+
+@st.cache_data(max_entries=32, show_spinner=False)
+def preset_caption(url):
+    return caption_pixel_values(preset_pixel_values(url))[0]
+
+@st.cache_data(max_entries=8, show_spinner=False)
+def caption_presets(names):
+    import torch
+
+    # Every requested preset shares one batched generate() call
+    batch = torch.cat([preset_pixel_values(PRESETS[name]) for name in names])
+    return dict(zip(names, caption_pixel_values(batch)))
+
+@st.cache_resource
+def caption_executor():
+    # Shared by all sessions so captioning runs off the script thread
+    # One worker: GPU generate() and its CUDA graphs must not run from two threads at once
+    executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix=CAPTION_THREAD)
+    # Warm-up goes first, so it runs before any caption and on the thread captions use
+    executor.submit(_warm_blip)
+    return executor
+
+def start_caption(fn, *args):
+    return caption_executor().submit(fn, *args)
+
+def wait_for_caption(job):
+    # The script thread only waits on the queued job; other sessions keep submitting
+    with st.status("Generating caption...", expanded=False) as status:
+        try:
+            result = job.result(timeout=CAPTION_TIMEOUT)
+        except JobTimeout:
+            status.update(label="Captioning timed out", state="error")
+            return None
+        status.update(label="Caption ready", state="complete")
+    return result
+
+@st.cache_data(max_entries=64, show_spinner=False)
+def _tts_html(text):
+    # base64 keeps quotes/markup in a caption from breaking out of the script literal
+    encoded = base64.b64encode(text.encode("utf-8")).decode("ascii")
+    return f"""
+        <script>
+        function speak() {{
+            const bytes = Uint8Array.from(atob("{encoded}"), c => c.charCodeAt(0));
+            const msg = new SpeechSynthesisUtterance(new TextDecoder().decode(bytes));
+            window.speechSynthesis.cancel();
+            window.speechSynthesis.speak(msg);
+        }}
+        </script>
+        <button onclick="speak()" style="
+            padding:8px 12px;
+            font-size:14px;
+            border-radius:6px;
+            border:1px solid #ccc;
+            cursor:pointer;">
+            🔊 Read Caption Aloud
+        </button>
+        """
+
+def tts_button(text):
+    components.html(_tts_html(text), height=60)